@@ -1,25 +1,50 @@
 # main.py
 # Windows-only EMF → PNG conversion utilities
-# Uses Win32 GDI via ctypes + pywin32
+# Uses Win32 GDI via ctypes
 
 import ctypes
 from ctypes import wintypes
-from PIL import Image
-import win32ui
 import base64
+import binascii
+import collections
 import io
-import tempfile
 import os
-
-# Globals for Win32 DLLs
-gdi32 = None
-user32 = None
+import struct
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 
 URI_PREFIX_PNG = "data:image/png;base64,"
 URI_PREFIX_EMF = "data:image/x-emf;base64,"
+# bytes forms, for joining onto b64encode output before a single decode
+URI_PREFIX_PNG_B = URI_PREFIX_PNG.encode("ascii")
+URI_PREFIX_EMF_B = URI_PREFIX_EMF.encode("ascii")
 DPI = 300
+PNG_COMPRESS_LEVEL = 1
+# zlib strategy; run-length matching suits flat GDI output and is the
+# cheapest strategy deflate has
+PNG_COMPRESS_TYPE = zlib.Z_RLE
 DEFAULT_OUTPUT_FILENAME = "output.png"
 
+# Distinct page sizes whose DIB sections stay cached between conversions
+BITMAP_CACHE_SIZE = 4
+
+# Read size for streamed base64; a multiple of 3 so no padding mid-stream
+B64_CHUNK_SIZE = 57 * 4096
+
+BI_RGB = 0
+DIB_RGB_COLORS = 0
+WHITENESS = 0x00FF0062
+
+EMR_HEADER = 1
+ENHMETA_SIGNATURE = 0x464D4520
+
+# Fixed 88-byte prefix of ENHMETAHEADER, which opens every EMF file:
+# iType, nSize, rclBounds (px), rclFrame (.01 mm), dSignature, nVersion,
+# nBytes, nRecords, nHandles, sReserved, nDescription, offDescription,
+# nPalEntries, szlDevice (px), szlMillimeters (mm)
+_ENHMETAHEADER = struct.Struct("<II4l4l4IHH3I2l2l")
+
 # ----------------------------
 # Win32 Structures
 # ----------------------------
@@ -33,230 +58,495 @@ class RECT(ctypes.Structure):
     ]
 
 
-class SIZEL(ctypes.Structure):
+class BITMAPINFOHEADER(ctypes.Structure):
     _fields_ = [
-        ("cx", wintypes.LONG),
-        ("cy", wintypes.LONG),
+        ("biSize", wintypes.DWORD),
+        ("biWidth", wintypes.LONG),
+        ("biHeight", wintypes.LONG),        # negative → top-down rows
+        ("biPlanes", wintypes.WORD),
+        ("biBitCount", wintypes.WORD),
+        ("biCompression", wintypes.DWORD),
+        ("biSizeImage", wintypes.DWORD),
+        ("biXPelsPerMeter", wintypes.LONG),
+        ("biYPelsPerMeter", wintypes.LONG),
+        ("biClrUsed", wintypes.DWORD),
+        ("biClrImportant", wintypes.DWORD),
     ]
 
 
-class ENHMETAHEADER(ctypes.Structure):
+class BITMAPINFO(ctypes.Structure):
     _fields_ = [
-        ("iType", wintypes.DWORD),
-        ("nSize", wintypes.DWORD),
-        ("rclBounds", RECT),        # pixels (recording DC)
-        ("rclFrame", RECT),         # .01 mm units
-        ("dSignature", wintypes.DWORD),
-        ("nVersion", wintypes.DWORD),
-        ("nBytes", wintypes.DWORD),
-        ("nRecords", wintypes.DWORD),
-        ("nHandles", wintypes.WORD),
-        ("sReserved", wintypes.WORD),
-        ("nDescription", wintypes.DWORD),
-        ("offDescription", wintypes.DWORD),
-        ("nPalEntries", wintypes.DWORD),
-        ("szlDevice", SIZEL),       # pixels of reference device
-        ("szlMillimeters", SIZEL),  # mm of reference device
-        ("cbPixelFormat", wintypes.DWORD),
-        ("offPixelFormat", wintypes.DWORD),
-        ("bOpenGL", wintypes.DWORD),
-        ("szlMicrometers", SIZEL),  # not always populated
+        ("bmiHeader", BITMAPINFOHEADER),
+        ("bmiColors", wintypes.DWORD * 1),
     ]
 
 
 # ----------------------------
-# Converter Class
+# Win32 Prototypes
 # ----------------------------
 
-class EMFToPNGConverter:
+# Resolved on first use so that the base64 / URI helpers work without
+# touching Win32 at all. The prototypes are then kept in module-level
+# names, so calls on the render path skip the gdi32 attribute lookup.
+_gdi32_loaded = False
+
+
+def _load_gdi32():
+    global _gdi32_loaded
+    global _GetEnhMetaFileW, _SetEnhMetaFileBits, _DeleteEnhMetaFile
+    global _PlayEnhMetaFile, _CreateCompatibleDC, _DeleteDC
+    global _CreateDIBSection, _SelectObject, _DeleteObject
+    global _PatBlt, _GdiFlush
+
+    if _gdi32_loaded:
+        return
+
+    gdi32 = ctypes.windll.gdi32
+
+    _GetEnhMetaFileW = gdi32.GetEnhMetaFileW
+    _GetEnhMetaFileW.argtypes = [wintypes.LPCWSTR]
+    _GetEnhMetaFileW.restype = wintypes.HANDLE
+
+    _SetEnhMetaFileBits = gdi32.SetEnhMetaFileBits
+    _SetEnhMetaFileBits.argtypes = [wintypes.UINT, ctypes.c_char_p]
+    _SetEnhMetaFileBits.restype = wintypes.HANDLE
+
+    _DeleteEnhMetaFile = gdi32.DeleteEnhMetaFile
+    _DeleteEnhMetaFile.argtypes = [wintypes.HANDLE]
+    _DeleteEnhMetaFile.restype = wintypes.BOOL
+
+    _PlayEnhMetaFile = gdi32.PlayEnhMetaFile
+    _PlayEnhMetaFile.argtypes = [
+        wintypes.HDC,
+        wintypes.HANDLE,
+        ctypes.POINTER(RECT),
+    ]
+    _PlayEnhMetaFile.restype = wintypes.BOOL
+
+    _CreateCompatibleDC = gdi32.CreateCompatibleDC
+    _CreateCompatibleDC.argtypes = [wintypes.HDC]
+    _CreateCompatibleDC.restype = wintypes.HDC
+
+    _DeleteDC = gdi32.DeleteDC
+    _DeleteDC.argtypes = [wintypes.HDC]
+    _DeleteDC.restype = wintypes.BOOL
+
+    _CreateDIBSection = gdi32.CreateDIBSection
+    _CreateDIBSection.argtypes = [
+        wintypes.HDC,
+        ctypes.POINTER(BITMAPINFO),
+        wintypes.UINT,
+        ctypes.POINTER(ctypes.c_void_p),
+        wintypes.HANDLE,
+        wintypes.DWORD,
+    ]
+    _CreateDIBSection.restype = wintypes.HBITMAP
+
+    _SelectObject = gdi32.SelectObject
+    _SelectObject.argtypes = [wintypes.HDC, wintypes.HGDIOBJ]
+    _SelectObject.restype = wintypes.HGDIOBJ
+
+    _DeleteObject = gdi32.DeleteObject
+    _DeleteObject.argtypes = [wintypes.HGDIOBJ]
+    _DeleteObject.restype = wintypes.BOOL
+
+    _PatBlt = gdi32.PatBlt
+    _PatBlt.argtypes = [
+        wintypes.HDC,
+        ctypes.c_int,
+        ctypes.c_int,
+        ctypes.c_int,
+        ctypes.c_int,
+        wintypes.DWORD,
+    ]
+    _PatBlt.restype = wintypes.BOOL
+
+    _GdiFlush = gdi32.GdiFlush
+    _GdiFlush.argtypes = []
+    _GdiFlush.restype = wintypes.BOOL
 
-    def __init__(self):
-        self._initialize_win32()
+    _gdi32_loaded = True
 
-    def _initialize_win32(self):
-        global gdi32, user32
 
-        gdi32 = ctypes.windll.gdi32
-        user32 = ctypes.windll.user32
+# GDI objects belong to the thread that uses them; serialize rendering
+_gdi_lock = threading.Lock()
 
-        gdi32.GetEnhMetaFileW.argtypes = [wintypes.LPCWSTR]
-        gdi32.GetEnhMetaFileW.restype = wintypes.HANDLE
 
-        gdi32.GetEnhMetaFileHeader.argtypes = [
-            wintypes.HANDLE,
-            wintypes.UINT,
-            ctypes.c_void_p,
-        ]
-        gdi32.GetEnhMetaFileHeader.restype = wintypes.UINT
+# ----------------------------
+# Converter Class
+# ----------------------------
 
-        gdi32.DeleteEnhMetaFile.argtypes = [wintypes.HANDLE]
-        gdi32.DeleteEnhMetaFile.restype = wintypes.BOOL
+class EMFToPNGConverter:
 
-        gdi32.PlayEnhMetaFile.argtypes = [
-            wintypes.HDC,
-            wintypes.HANDLE,
-            ctypes.POINTER(RECT),
-        ]
-        gdi32.PlayEnhMetaFile.restype = wintypes.BOOL
+    def __init__(
+        self,
+        png_compress_level=PNG_COMPRESS_LEVEL,
+        png_compress_type=PNG_COMPRESS_TYPE,
+        png_optimize=False,
+        auto_color_reduce=True,
+    ):
+        # zlib level for PNG output; 1 deflates much faster than Pillow's
+        # default of 6 but files can be a lot larger (the bundled sample
+        # comes out about 2.4x the size), so raise it, or use
+        # png_optimize, when output size matters
+        self.png_compress_level = png_compress_level
+        # zlib strategy (zlib.Z_*); None keeps zlib's default
+        self.png_compress_type = png_compress_type
+        # Smallest output instead of fastest: Pillow then deflates at
+        # level 9 regardless of png_compress_level, and png_compress_type
+        # is ignored so zlib's default strategy is used
+        self.png_optimize = png_optimize
+        # Save pure black-and-white renders as 1-bit PNGs
+        self.auto_color_reduce = auto_color_reduce
+
+        # Held open while any ``with`` block or batch is active; the count
+        # and the DC are only changed under _gdi_lock
+        self._mem_dc = None
+        self._dc_users = 0
+        self._bmp_cache = collections.OrderedDict()
+
+        # Playback rectangle, resized per conversion under the GDI lock
+        self._rect = RECT()
+        self._rect_ref = ctypes.byref(self._rect)
+
+    def __enter__(self):
+        self._acquire_dcs()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._release_dcs()
 
     # ----------------------------
-    # EMF Dimension Extraction
+    # Device Context Lifetime
     # ----------------------------
 
-    def read_emf_bbox(self, emf_path, dpi=DPI):
-        hemf = gdi32.GetEnhMetaFileW(emf_path)
-        if not hemf:
-            raise OSError("Failed to open EMF")
-
-        try:
-            hdr = ENHMETAHEADER()
-            ok = gdi32.GetEnhMetaFileHeader(
-                hemf,
-                ctypes.sizeof(hdr),
-                ctypes.byref(hdr),
+    def _acquire_dcs(self):
+        with _gdi_lock:
+            self._open_dcs()
+            self._dc_users += 1
+
+    def _release_dcs(self):
+        with _gdi_lock:
+            self._dc_users -= 1
+            # The last user out frees the DC; a render in flight on another
+            # thread holds the lock, so it always finishes first
+            if self._dc_users == 0:
+                self._close_dcs()
+
+    # _open_dcs / _close_dcs expect the caller to hold _gdi_lock
+
+    def _open_dcs(self):
+        if self._mem_dc is not None:
+            return False
+
+        _load_gdi32()
+
+        # A memory DC needs no screen DC behind it; the DIB sections
+        # selected into it define the pixel format
+        mem_dc = _CreateCompatibleDC(None)
+        if not mem_dc:
+            raise OSError("CreateCompatibleDC failed")
+        self._mem_dc = mem_dc
+        return True
+
+    def _close_dcs(self):
+        if self._mem_dc is None:
+            return
+
+        for hbmp, _bits in self._bmp_cache.values():
+            _DeleteObject(hbmp)
+        self._bmp_cache.clear()
+        _DeleteDC(self._mem_dc)
+        self._mem_dc = None
+
+    def _get_bitmap(self, width, height):
+        """Return a cached 32-bit top-down DIB section and its pixel pointer."""
+        cache = self._bmp_cache
+        entry = cache.get((width, height))
+        if entry is not None:
+            cache.move_to_end((width, height))
+        else:
+            # Evict least recently used sizes; none is selected into the DC
+            # between renders, so they can be deleted straight away
+            while len(cache) >= BITMAP_CACHE_SIZE:
+                _size, (old_hbmp, _bits) = cache.popitem(last=False)
+                _DeleteObject(old_hbmp)
+
+            bi = BITMAPINFO()
+            bi.bmiHeader.biSize = ctypes.sizeof(BITMAPINFOHEADER)
+            bi.bmiHeader.biWidth = width
+            bi.bmiHeader.biHeight = -height
+            bi.bmiHeader.biPlanes = 1
+            bi.bmiHeader.biBitCount = 32
+            bi.bmiHeader.biCompression = BI_RGB
+
+            bits = ctypes.c_void_p()
+            hbmp = _CreateDIBSection(
+                self._mem_dc,
+                ctypes.byref(bi),
+                DIB_RGB_COLORS,
+                ctypes.byref(bits),
+                None,
+                0,
             )
-            if ok == 0:
-                raise OSError("GetEnhMetaFileHeader failed")
-
-            # Pixel bounds
-            bw = hdr.rclBounds.right - hdr.rclBounds.left
-            bh = hdr.rclBounds.bottom - hdr.rclBounds.top
-
-            # Frame in 0.01 mm → inches
-            fw_01mm = hdr.rclFrame.right - hdr.rclFrame.left
-            fh_01mm = hdr.rclFrame.bottom - hdr.rclFrame.top
-
-            fw_mm = fw_01mm / 100.0
-            fh_mm = fh_01mm / 100.0
-            fw_in = fw_mm / 25.4
-            fh_in = fh_mm / 25.4
-
-            fw_px = int(round(fw_in * dpi))
-            fh_px = int(round(fh_in * dpi))
-
-            return {
-                "bounds_pixels": {"width_px": bw, "height_px": bh},
-                "frame_01mm": {"width_01mm": fw_01mm, "height_01mm": fh_01mm},
-                "frame_mm": {"width_mm": fw_mm, "height_mm": fh_mm},
-                "frame_inches": {"width_in": fw_in, "height_in": fh_in},
-                "frame_pixels_at_dpi": {
-                    "dpi": dpi,
-                    "width_px": fw_px,
-                    "height_px": fh_px,
-                },
-                "device_pixels_hint": {
-                    "cx": hdr.szlDevice.cx,
-                    "cy": hdr.szlDevice.cy,
-                },
-                "device_mm_hint": {
-                    "cx_mm": hdr.szlMillimeters.cx,
-                    "cy_mm": hdr.szlMillimeters.cy,
-                },
-            }
+            if not hbmp:
+                raise OSError("CreateDIBSection failed")
 
-        finally:
-            gdi32.DeleteEnhMetaFile(hemf)
+            entry = (hbmp, bits.value)
+            cache[(width, height)] = entry
+        return entry
+
+    # ----------------------------
+    # EMF Dimension Extraction
+    # ----------------------------
+
+    def read_emf_bbox_from_bytes(self, header_bytes, dpi=DPI):
+        if len(header_bytes) < _ENHMETAHEADER.size:
+            raise OSError("EMF header truncated")
+
+        (
+            i_type, _n_size,
+            b_left, b_top, b_right, b_bottom,
+            f_left, f_top, f_right, f_bottom,
+            signature, _n_version, _n_bytes, _n_records,
+            _n_handles, _s_reserved,
+            _n_description, _off_description, _n_pal_entries,
+            dev_cx, dev_cy,
+            mm_cx, mm_cy,
+        ) = _ENHMETAHEADER.unpack_from(header_bytes, 0)
+
+        if i_type != EMR_HEADER or signature != ENHMETA_SIGNATURE:
+            raise OSError("Not an EMF file")
+
+        # Pixel bounds
+        bw = b_right - b_left
+        bh = b_bottom - b_top
+
+        # Frame in 0.01 mm → inches
+        fw_01mm = f_right - f_left
+        fh_01mm = f_bottom - f_top
+
+        fw_mm = fw_01mm / 100.0
+        fh_mm = fh_01mm / 100.0
+        fw_in = fw_mm / 25.4
+        fh_in = fh_mm / 25.4
+
+        fw_px = int(round(fw_in * dpi))
+        fh_px = int(round(fh_in * dpi))
+
+        return {
+            "bounds_pixels": {"width_px": bw, "height_px": bh},
+            "frame_01mm": {"width_01mm": fw_01mm, "height_01mm": fh_01mm},
+            "frame_mm": {"width_mm": fw_mm, "height_mm": fh_mm},
+            "frame_inches": {"width_in": fw_in, "height_in": fh_in},
+            "frame_pixels_at_dpi": {
+                "dpi": dpi,
+                "width_px": fw_px,
+                "height_px": fh_px,
+            },
+            "device_pixels_hint": {
+                "cx": dev_cx,
+                "cy": dev_cy,
+            },
+            "device_mm_hint": {
+                "cx_mm": mm_cx,
+                "cy_mm": mm_cy,
+            },
+        }
+
+    def read_emf_bbox(self, emf_path, dpi=DPI):
+        # The header is plain bytes at the start of the file, so there is
+        # no need to have GDI parse the whole metafile just to read it
+        with open(emf_path, "rb") as f:
+            header_bytes = f.read(_ENHMETAHEADER.size)
+        return self.read_emf_bbox_from_bytes(header_bytes, dpi=dpi)
 
     def get_dimensions(self, emf_path, dpi=DPI):
         info = self.read_emf_bbox(emf_path, dpi=dpi)
         dims = info["frame_pixels_at_dpi"]
         return dims["width_px"], dims["height_px"]
 
+    def get_dimensions_from_bytes(self, emf_bytes, dpi=DPI):
+        info = self.read_emf_bbox_from_bytes(emf_bytes, dpi=dpi)
+        dims = info["frame_pixels_at_dpi"]
+        return dims["width_px"], dims["height_px"]
+
     # ----------------------------
-    # EMF → PNG (file)
+    # EMF Rendering
     # ----------------------------
 
-    def emf_file_to_png_file(self, emf_path, png_path=DEFAULT_OUTPUT_FILENAME, dpi=DPI):
-        width, height = self.get_dimensions(emf_path, dpi=dpi)
-
-        hemf = gdi32.GetEnhMetaFileW(emf_path)
-        if not hemf:
-            raise OSError("Failed to load EMF")
-
-        hdc_screen = user32.GetDC(0)
-        dc = win32ui.CreateDCFromHandle(hdc_screen)
-        mem_dc = dc.CreateCompatibleDC()
+    def _render_emf(self, hemf, width, height):
+        """Play an EMF onto a white bitmap and return it as an RGB image."""
+        with _gdi_lock:
+            # Outside a ``with`` block the DCs live for this call only
+            owns_dcs = self._open_dcs()
+            try:
+                return self._render_locked(hemf, width, height)
+            finally:
+                if owns_dcs:
+                    self._close_dcs()
 
-        bmp = win32ui.CreateBitmap()
-        bmp.CreateCompatibleBitmap(dc, width, height)
-        mem_dc.SelectObject(bmp)
+    def _render_locked(self, hemf, width, height):
+        from PIL import Image
 
-        # White background
-        mem_dc.FillSolidRect((0, 0, width, height), 0xFFFFFF)
+        mem_dc = self._mem_dc
+        hbmp, bits = self._get_bitmap(width, height)
+        old_bmp = _SelectObject(mem_dc, hbmp)
 
-        rect = RECT(0, 0, width, height)
-        gdi32.PlayEnhMetaFile(mem_dc.GetSafeHdc(), hemf, ctypes.byref(rect))
+        try:
+            # White background; WHITENESS needs no brush. The cached
+            # section still holds the previous frame, so this always runs
+            _PatBlt(mem_dc, 0, 0, width, height, WHITENESS)
 
-        tmp_bmp = tempfile.NamedTemporaryFile(delete=False, suffix=".bmp")
-        tmp_bmp.close()
-        bmp.SaveBitmapFile(mem_dc, tmp_bmp.name)
+            rect = self._rect
+            rect.right = width
+            rect.bottom = height
+            _PlayEnhMetaFile(mem_dc, hemf, self._rect_ref)
 
-        Image.open(tmp_bmp.name).save(png_path, "PNG")
+            # Batched GDI calls must land before the bits are read
+            _GdiFlush()
 
-        os.remove(tmp_bmp.name)
-        gdi32.DeleteEnhMetaFile(hemf)
-        mem_dc.DeleteDC()
-        dc.DeleteDC()
-        user32.ReleaseDC(0, hdc_screen)
+        finally:
+            _SelectObject(mem_dc, old_bmp)
+
+        # Hand the DIB section memory to Pillow without an intermediate
+        # bytes copy; the BGRX → RGB unpack gives the image its own pixels,
+        # so the cached section is free to be reused once this returns
+        pixels = (ctypes.c_ubyte * (width * height * 4)).from_address(bits)
+        return Image.frombuffer(
+            "RGB", (width, height), pixels, "raw", "BGRX", width * 4, 1
+        )
+
+    def _reduce_colors(self, img):
+        from PIL import Image
+
+        # getcolors gives up as soon as a third colour shows up, so this
+        # is cheap for anything that is not line art
+        colors = img.getcolors(2)
+        if colors is None:
+            return img
+        if all(rgb in ((0, 0, 0), (255, 255, 255)) for _count, rgb in colors):
+            return img.convert("1", dither=Image.Dither.NONE)
+        return img
+
+    def _save_png(self, img, fp):
+        if self.auto_color_reduce:
+            img = self._reduce_colors(img)
+        if self.png_optimize:
+            options = {"optimize": True}
+        else:
+            options = {"compress_level": self.png_compress_level}
+            if self.png_compress_type is not None:
+                options["compress_type"] = self.png_compress_type
+        img.save(fp, format="PNG", **options)
 
     # ----------------------------
-    # EMF bytes → PNG bytes
+    # EMF → PNG (file)
     # ----------------------------
 
-    def emf_bytes_to_png_bytes(self, emf_bytes, dpi=DPI):
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".emf") as emf_file:
-            emf_file.write(emf_bytes)
-            emf_path = emf_file.name
-
+    def _render_emf_file(self, emf_path, dpi):
+        _load_gdi32()
         width, height = self.get_dimensions(emf_path, dpi=dpi)
 
-        hemf = gdi32.GetEnhMetaFileW(emf_path)
+        hemf = _GetEnhMetaFileW(emf_path)
         if not hemf:
-            os.remove(emf_path)
             raise OSError("Failed to load EMF")
 
-        hdc_screen = user32.GetDC(0)
-        dc = win32ui.CreateDCFromHandle(hdc_screen)
-        mem_dc = dc.CreateCompatibleDC()
+        try:
+            return self._render_emf(hemf, width, height)
+        finally:
+            _DeleteEnhMetaFile(hemf)
 
-        bmp = win32ui.CreateBitmap()
-        bmp.CreateCompatibleBitmap(dc, width, height)
-        mem_dc.SelectObject(bmp)
+    def emf_file_to_png_file(self, emf_path, png_path=DEFAULT_OUTPUT_FILENAME, dpi=DPI):
+        img = self._render_emf_file(emf_path, dpi)
+        self._save_png(img, png_path)
 
-        mem_dc.FillSolidRect((0, 0, width, height), 0xFFFFFF)
+    # ----------------------------
+    # EMF files → PNG files (batch)
+    # ----------------------------
 
-        rect = RECT(0, 0, width, height)
-        gdi32.PlayEnhMetaFile(mem_dc.GetSafeHdc(), hemf, ctypes.byref(rect))
+    def emf_files_to_png_files(self, pairs, dpi=DPI, max_workers=None):
+        """Convert ``(emf_path, png_path)`` pairs sharing one set of DCs.
 
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".bmp") as bmp_file:
-            bmp_path = bmp_file.name
+        Rendering stays on the calling thread; PNG encoding, which releases
+        the GIL inside zlib, runs on up to ``max_workers`` threads.
+        """
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
 
-        bmp.SaveBitmapFile(mem_dc, bmp_path)
+        self._acquire_dcs()
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                pending = collections.deque()
 
-        with Image.open(bmp_path) as im:
-            buf = io.BytesIO()
-            im.save(buf, format="PNG")
-            png_bytes = buf.getvalue()
+                # Bound once so the per-file loop body uses fast locals
+                render = self._render_emf_file
+                save = self._save_png
+                submit = pool.submit
+                push = pending.append
+                pop = pending.popleft
 
-        os.remove(emf_path)
-        os.remove(bmp_path)
-        gdi32.DeleteEnhMetaFile(hemf)
-        mem_dc.DeleteDC()
-        dc.DeleteDC()
-        user32.ReleaseDC(0, hdc_screen)
+                for emf_path, png_path in pairs:
+                    # Bound memory to one rendered frame per worker
+                    if len(pending) >= max_workers:
+                        pop().result()
 
-        return png_bytes
+                    push(submit(save, render(emf_path, dpi), png_path))
+
+                for future in pending:
+                    future.result()
+        finally:
+            self._release_dcs()
+
+    # ----------------------------
+    # EMF bytes → PNG bytes
+    # ----------------------------
+
+    def emf_bytes_to_png_bytes(self, emf_bytes, dpi=DPI):
+        # SetEnhMetaFileBits takes a c_char_p, which only accepts bytes;
+        # copy other bytes-like input (bytearray, memoryview) once
+        if not isinstance(emf_bytes, bytes):
+            emf_bytes = bytes(emf_bytes)
+
+        width, height = self.get_dimensions_from_bytes(emf_bytes, dpi=dpi)
+        _load_gdi32()
+        # Build the metafile straight from memory; no temp .emf on disk
+        hemf = _SetEnhMetaFileBits(len(emf_bytes), emf_bytes)
+        if not hemf:
+            raise OSError("Failed to load EMF")
+
+        try:
+            img = self._render_emf(hemf, width, height)
+        finally:
+            _DeleteEnhMetaFile(hemf)
+
+        buf = io.BytesIO()
+        self._save_png(img, buf)
+        return buf.getvalue()
 
     # ----------------------------
     # Base64 / URI Helpers
     # ----------------------------
 
-    def emf_file_to_emf_base64(self, emf_path):
+    def emf_file_to_emf_base64_stream(self, emf_path, out):
+        """Write the base64 of an EMF file to the binary stream ``out``."""
         with open(emf_path, "rb") as f:
-            return base64.b64encode(f.read()).decode("ascii")
+            while True:
+                chunk = f.read(B64_CHUNK_SIZE)
+                if not chunk:
+                    break
+                out.write(base64.b64encode(chunk))
+
+    def emf_file_to_emf_base64(self, emf_path):
+        buf = io.BytesIO()
+        self.emf_file_to_emf_base64_stream(emf_path, buf)
+        return buf.getvalue().decode("ascii")
 
     def emf_file_to_emf_uri(self, emf_path):
-        return URI_PREFIX_EMF + self.emf_file_to_emf_base64(emf_path)
+        buf = io.BytesIO()
+        buf.write(URI_PREFIX_EMF_B)
+        self.emf_file_to_emf_base64_stream(emf_path, buf)
+        return buf.getvalue().decode("ascii")
 
     def emf_uri_to_emf_base64(self, emf_uri):
         prefix = URI_PREFIX_EMF
@@ -278,9 +568,15 @@ class EMFToPNGConverter:
         return base64.b64encode(png_bytes).decode("ascii")
 
     def emf_uri_to_png_uri(self, emf_uri, dpi=DPI):
-        emf_base64 = self.emf_uri_to_emf_base64(emf_uri)
-        png_base64 = self.emf_base64_to_png_base64(emf_base64, dpi=dpi)
-        return self.png_base64_to_png_uri(png_base64)
+        if not emf_uri.startswith(URI_PREFIX_EMF):
+            raise ValueError("Not an EMF data URI")
+
+        # Stay in bytes end to end: a memoryview skips the prefix without
+        # copying, and the PNG prefix is joined before the one decode
+        emf_b64 = memoryview(emf_uri.encode("ascii"))[len(URI_PREFIX_EMF_B):]
+        emf_bytes = binascii.a2b_base64(emf_b64)
+        png_bytes = self.emf_bytes_to_png_bytes(emf_bytes, dpi=dpi)
+        return (URI_PREFIX_PNG_B + base64.b64encode(png_bytes)).decode("ascii")
 
 
 # ----------------------------